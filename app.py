@@ -1,7 +1,6 @@
 import streamlit as st
 import os
-import base64
-from datetime import datetime
+import orjson
 from research_agent import DeepResearchAgent
 
 
@@ -12,29 +11,54 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-with open("./assets/bright-data-logo.png", "rb") as brightdata_logo:
-    brightdata_logo = base64.b64encode(brightdata_logo.read()).decode()
-    title_hmtl = f"""
-    <div>
-        <img src="data:image/png;base64,{brightdata_logo}" style="height: 60px; width:150px;"/>
-        <h1 style="margin: 0; padding: 0; font-size: 2.5rem; font-weight: bold;">
-            <span style="font-size:2.5rem;">🔎</span> Deep Research Agent with
-            <span style="color: #0000FF;">Bright Data</span> & 
-            <span style="color: #8564ff;">Ollama</span>
-        </h1>
-    </div>
+
+# Served from ./static (see .streamlit/config.toml) so the browser can cache it
+TITLE_HTML = """
+<div>
+    <img src="app/static/bright-data-logo.png" style="height: 60px; width:150px;"/>
+    <h1 style="margin: 0; padding: 0; font-size: 2.5rem; font-weight: bold;">
+        <span style="font-size:2.5rem;">🔎</span> Deep Research Agent with
+        <span style="color: #0000FF;">Bright Data</span> & 
+        <span style="color: #8564ff;">Ollama</span>
+    </h1>
+</div>
+"""
+
+
+@st.cache_resource
+def get_agent(api_key: str, model: str) -> DeepResearchAgent:
+    """Create one research agent per (API key, model) and share it across reruns"""
+    return DeepResearchAgent(bright_data_api_key=api_key, ollama_model=model)
+
+
+class ResearchError(Exception):
+    """Raised when the agent reports a failed research run"""
+
+
+@st.cache_data(persist="disk", max_entries=200, show_spinner=False)
+def _cached_research(query: str, model: str, _api_key: str, limit: int) -> dict:
+    """Run research and cache the result on disk per (query, model, limit).
+
+    The API key is excluded from the cache key. Failed runs raise instead
+    of returning so they are never cached.
     """
-    st.markdown(title_hmtl, unsafe_allow_html=True)
+    agent = get_agent(_api_key, model)
+    result = agent.conduct_research(query=query, limit=limit)
+    if "error" in result:
+        raise ResearchError(result["error"])
+    return result
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _load_research_history(_agent: DeepResearchAgent) -> dict:
+    """Read stored research from the shared knowledge base, briefly cached"""
+    return _agent.get_research_history()
 
 
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'research_agent' not in st.session_state:
-        st.session_state.research_agent = None
-    if 'research_history' not in st.session_state:
-        st.session_state.research_history = []
-    if 'current_research' not in st.session_state:
-        st.session_state.current_research = None
+    st.session_state.setdefault('research_agent', None)
+    st.session_state.setdefault('current_research', None)
 
 
 def setup_sidebar():
@@ -70,6 +94,9 @@ def setup_sidebar():
         st.subheader("📚 Research History")
         if st.button("View Research History", use_container_width=True):
             view_research_history()
+        if st.button("Clear Cached Research", use_container_width=True):
+            _cached_research.clear()
+            st.sidebar.success("🗑️ Cached research cleared")
 
         st.markdown("---")
         st.markdown("### 📖 Resources")
@@ -84,7 +111,7 @@ def view_research_history():
     """Display previous research sessions"""
     if st.session_state.research_agent:
         try:
-            history = st.session_state.research_agent.get_research_history()
+            history = _load_research_history(st.session_state.research_agent)
             if history and history.get('documents'):
                 st.subheader("📖 Research History")
                 for i, (doc, metadata) in enumerate(zip(history['documents'], history['metadatas'])):
@@ -96,10 +123,59 @@ def view_research_history():
             st.error(f"Error loading research history: {e}")
 
 
+@st.fragment
+def _render_results():
+    """Render the current research; widget changes here rerun only this fragment"""
+    research_data = st.session_state.current_research
+
+    st.markdown("---")
+    st.markdown(
+        f'<div class="success-box">✅ Research Complete! Found {research_data["total_sources"]} sources</div>', unsafe_allow_html=True)
+
+    st.subheader("💡 Overall Research Insights")
+    st.markdown(
+        f'<div class="summary-box">{research_data["overall_insights"]}</div>', unsafe_allow_html=True)
+
+    st.subheader("📋 Source Summaries")
+
+    # Summaries were generated for results with content, in the same order
+    contents = [item["content"] for item in research_data["raw_data"].get("results", [])
+                if item.get("content")]
+    agent = st.session_state.research_agent
+
+    for i, summary in enumerate(research_data["summaries"]):
+        with st.expander(f"Source {i+1}: {summary['title']}", expanded=i == 0):
+            col_a, col_b = st.columns([3, 1])
+
+            with col_a:
+                st.markdown("**AI Summary:**")
+                st.info(summary['summary'])
+                # Uses the model selected now, which may differ from the one
+                # that produced the stored summary, so the label names it
+                label = (f"🔄 Regenerate with {agent.ollama_processor.model}"
+                         if agent else "🔄 Regenerate Summary")
+                if st.button(label, key=f"regenerate_{i}", disabled=not agent):
+                    summary['summary'] = st.write_stream(
+                        agent.ollama_processor.stream_summarize(contents[i]))
+                    st.rerun(scope="fragment")
+
+            with col_b:
+                st.markdown("**Source Info:**")
+                st.write(f"🔗 **Source:** {summary['source']}")
+                st.write(
+                    f"📝 **Content Preview:** {summary['original_content'][:200]}...")
+
+    with st.expander("📊 View Raw Research Data"):
+        st.code(orjson.dumps(research_data["raw_data"], option=orjson.OPT_INDENT_2).decode(),
+                language="json")
+
+
 def main():
     """Main application function"""
     initialize_session_state()
 
+    st.markdown(TITLE_HTML, unsafe_allow_html=True)
+
     st.markdown('<div class="main-header">🔎 Local Deep Research Agent</div>',
                 unsafe_allow_html=True)
     st.markdown(
@@ -107,12 +183,10 @@ def main():
 
     bright_data_api, ollama_model, sources_limit = setup_sidebar()
 
-    if bright_data_api and not st.session_state.research_agent:
+    if bright_data_api:
         try:
-            st.session_state.research_agent = DeepResearchAgent(
-                bright_data_api_key=bright_data_api,
-                ollama_model=ollama_model
-            )
+            st.session_state.research_agent = get_agent(
+                bright_data_api, ollama_model)
             st.sidebar.success("✅ Research Agent Initialized!")
         except Exception as e:
             st.error(f"Failed to initialize research agent: {e}")
@@ -148,53 +222,19 @@ def main():
 
         with st.spinner("🔍 Conducting deep research... This may take a few minutes."):
             try:
-                research_result = st.session_state.research_agent.conduct_research(
-                    query=research_query,
-                    limit=sources_limit
-                )
-
-                if "error" in research_result:
-                    st.error(f"Research failed: {research_result['error']}")
-                else:
-                    st.session_state.current_research = research_result
-                    st.session_state.research_history.append({
-                        "timestamp": datetime.now().isoformat(),
-                        "query": research_query,
-                        "result": research_result
-                    })
+                research_result = _cached_research(
+                    research_query, ollama_model, bright_data_api, sources_limit)
 
+                st.session_state.current_research = research_result
+                _load_research_history.clear()
+
+            except ResearchError as e:
+                st.error(f"Research failed: {e}")
             except Exception as e:
                 st.error(f"Research error: {str(e)}")
 
     if st.session_state.current_research:
-        research_data = st.session_state.current_research
-
-        st.markdown("---")
-        st.markdown(
-            f'<div class="success-box">✅ Research Complete! Found {research_data["total_sources"]} sources</div>', unsafe_allow_html=True)
-
-        st.subheader("💡 Overall Research Insights")
-        st.markdown(
-            f'<div class="summary-box">{research_data["overall_insights"]}</div>', unsafe_allow_html=True)
-
-        st.subheader("📋 Source Summaries")
-
-        for i, summary in enumerate(research_data["summaries"]):
-            with st.expander(f"Source {i+1}: {summary['title']}", expanded=i == 0):
-                col_a, col_b = st.columns([3, 1])
-
-                with col_a:
-                    st.markdown("**AI Summary:**")
-                    st.info(summary['summary'])
-
-                with col_b:
-                    st.markdown("**Source Info:**")
-                    st.write(f"🔗 **Source:** {summary['source']}")
-                    st.write(
-                        f"📝 **Content Preview:** {summary['original_content'][:200]}...")
-
-        with st.expander("📊 View Raw Research Data"):
-            st.json(research_data["raw_data"])
+        _render_results()
 
     elif not st.session_state.current_research:
         st.markdown("---")
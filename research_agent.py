@@ -1,8 +1,74 @@
-import requests
-import subprocess
+import atexit
+import io
+import os
+import threading
+import httpx
+import numpy as np
+import ollama
+import onnxruntime
+import orjson
 import chromadb
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from optimum.onnxruntime import ORTModelForFeatureExtraction
+from transformers import AutoTokenizer
+from typing import List, Dict, Any, Iterator, Optional
 import time
+import uuid
+
+
+class OnnxEmbedder:
+    """Sentence embedder running on ONNX Runtime, on GPU when available"""
+
+    PREFERRED_PROVIDERS = ["CUDAExecutionProvider",
+                           "DmlExecutionProvider", "CPUExecutionProvider"]
+
+    def __init__(self, model_name: str, max_length: int = 256):
+        available = onnxruntime.get_available_providers()
+        provider = next(p for p in self.PREFERRED_PROVIDERS
+                        if p in available or p == "CPUExecutionProvider")
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Load the ONNX file published with the model rather than exporting
+        # from PyTorch on every start. Numpy in/out everywhere, so skip
+        # torch-based IO binding on GPU.
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_name,
+            subfolder="onnx",
+            file_name="model.onnx",
+            provider=provider,
+            use_io_binding=False
+        )
+        print(f"🧮 Embedding with {model_name} on {provider}")
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Embed texts as mean-pooled, L2-normalized vectors"""
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / \
+                np.clip(mask.sum(axis=1), 1e-9, None)
+            batches.append(
+                pooled / np.linalg.norm(pooled, axis=1, keepdims=True))
+        return np.concatenate(batches)
+
+
+class SummarizationError(Exception):
+    """Raised when the Ollama model does not produce a summary"""
+
+
+@lru_cache(maxsize=None)
+def _load_embedder(model_name: str) -> OnnxEmbedder:
+    """Load an embedding model once per process"""
+    return OnnxEmbedder(model_name)
 
 
 class BrightDataClient:
@@ -11,6 +77,20 @@ class BrightDataClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.brightdata.com/dca/trigger"
+        # Pooled HTTP/2 connection reused across fetches
+        self.session = httpx.Client(
+            http2=True,
+            timeout=httpx.Timeout(60.0),
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            }
+        )
+        atexit.register(self.session.close)
+
+    def close(self):
+        """Close the underlying HTTP connection pool"""
+        self.session.close()
 
     def fetch_research_data(self, query: str, limit: int = 20) -> Dict[str, Any]:
         """Fetch research data using Bright Data API"""
@@ -19,21 +99,17 @@ class BrightDataClient:
             "limit": limit,
             "format": "structured"
         }
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
 
         try:
             print(f"📡 Fetching research data for: {query}")
-            response = requests.post(
-                self.base_url, json=payload, headers=headers)
+            response = self.session.post(self.base_url, json=payload)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             print(
                 f"✅ Successfully fetched {len(data.get('results', []))} results")
             return data
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError covers undecodable bodies (orjson.JSONDecodeError)
             print(f"❌ Bright Data API error: {e}")
             return {"error": str(e), "results": []}
 
@@ -41,88 +117,129 @@ class BrightDataClient:
 class OllamaProcessor:
     """Handler for local Ollama model operations"""
 
-    def __init__(self, model: str = "llama2"):
+    # Bounded, low-temperature decode with a small context window keeps
+    # prefill and generation time predictable on local hardware
+    GENERATE_OPTIONS = {"num_ctx": 2048, "num_predict": 384, "temperature": 0.3}
+    # Characters of content kept in a summarization prompt
+    SUMMARY_MAX_LENGTH = 1500
+
+    def __init__(self, model: str = "llama2", host: str = "http://localhost:11434"):
         self.model = model
-        self._check_ollama_available()
+        # One persistent client keeps the HTTP connection to the server alive
+        self.client = ollama.Client(host=host, timeout=120)
+        if self._check_ollama_available():
+            threading.Thread(target=self._warm_up, daemon=True).start()
 
     def _check_ollama_available(self) -> bool:
-        """Check if Ollama is installed and accessible"""
+        """Check if the Ollama server is running and accessible"""
         try:
-            result = subprocess.run(
-                ['ollama', 'list'], capture_output=True, text=True)
-            if result.returncode != 0:
-                print(
-                    "❌ Ollama not found. Please install Ollama from https://ollama.ai/")
-                return False
+            self.client.list()
             print(f"✅ Ollama is available. Using model: {self.model}")
             return True
+        except httpx.ConnectError:
+            print(
+                "❌ Ollama not found. Please install Ollama from https://ollama.ai/")
+            return False
         except Exception as e:
             print(f"❌ Ollama check failed: {e}")
             return False
 
-    def summarize_content(self, content: str, max_length: int = 2000) -> str:
-        """Summarize content using local Ollama model"""
-        if not content.strip():
-            return "No content available for summarization"
+    def _warm_up(self):
+        """Load the model into memory ahead of the first real request"""
+        try:
+            # An empty prompt only loads the model; nothing is generated.
+            # num_ctx must match real requests or Ollama reloads the model.
+            self.client.generate(
+                model=self.model,
+                prompt="",
+                options={"num_ctx": self.GENERATE_OPTIONS["num_ctx"]},
+                keep_alive="30m"
+            )
+            print(f"🔥 Model {self.model} is loaded")
+        except Exception as e:
+            print(f"⚠️ Model warm-up failed: {e}")
 
-        # Truncate content to avoid context limits
+    def _build_summary_prompt(self, content: str, max_length: int = SUMMARY_MAX_LENGTH) -> str:
+        """Build the summarization prompt for a piece of content"""
+        # Truncate content to avoid context limits; every prompt token adds
+        # prefill latency, so the instruction is kept to a single line
         truncated_content = content[:max_length]
 
-        prompt = f"""
-        Please provide a concise summary of the following content. 
-        Focus on key points, main ideas, and important findings.
-        
-        Content:
-        {truncated_content}
-        
-        Summary:
-        """
+        return f"Summarize the following concisely, focusing on key points:\n\n{truncated_content}\n\nSummary:"
+
+    def _generate(self, prompt: str, options: Dict[str, Any] = None) -> str:
+        """Run a single non-streaming generation and return the response text"""
+        response = self.client.generate(
+            model=self.model,
+            prompt=prompt,
+            options=options or self.GENERATE_OPTIONS,
+            keep_alive="30m"
+        )
+        return response["response"].strip()
+
+    def summarize(self, content: str, max_length: int = SUMMARY_MAX_LENGTH) -> str:
+        """Summarize content, raising SummarizationError if no summary is produced"""
+        if not content.strip():
+            raise SummarizationError("No content available for summarization")
+
+        prompt = self._build_summary_prompt(content, max_length)
 
         try:
-            result = subprocess.run(
-                ['ollama', 'run', self.model, prompt],
-                capture_output=True,
-                text=True,
-                timeout=120  # 2 minute timeout
-            )
+            summary = self._generate(prompt)
+        except ollama.ResponseError as e:
+            raise SummarizationError(f"Summarization error: {e.error}") from e
+        except httpx.TimeoutException as e:
+            raise SummarizationError("Summarization timed out after 2 minutes") from e
+        except Exception as e:
+            raise SummarizationError(f"Summarization failed: {str(e)}") from e
+
+        if not summary:
+            raise SummarizationError("Summarization returned an empty response")
+        return summary
 
-            if result.returncode == 0:
-                return result.stdout.strip()
-            else:
-                return f"Summarization error: {result.stderr}"
+    def summarize_content(self, content: str, max_length: int = SUMMARY_MAX_LENGTH) -> str:
+        """Summarize content using local Ollama model, describing any failure in the text"""
+        try:
+            return self.summarize(content, max_length)
+        except SummarizationError as e:
+            return str(e)
 
-        except subprocess.TimeoutExpired:
-            return "Summarization timed out after 2 minutes"
+    def stream_summarize(self, content: str, max_length: int = SUMMARY_MAX_LENGTH) -> Iterator[str]:
+        """Summarize content, yielding response chunks as the model produces them"""
+        if not content.strip():
+            yield "No content available for summarization"
+            return
+
+        prompt = self._build_summary_prompt(content, max_length)
+
+        try:
+            for chunk in self.client.generate(
+                model=self.model,
+                prompt=prompt,
+                options=self.GENERATE_OPTIONS,
+                keep_alive="30m",
+                stream=True
+            ):
+                yield chunk["response"]
+        except ollama.ResponseError as e:
+            yield f"Summarization error: {e.error}"
+        except httpx.TimeoutException:
+            yield "Summarization timed out after 2 minutes"
         except Exception as e:
-            return f"Summarization failed: {str(e)}"
+            yield f"Summarization failed: {str(e)}"
 
     def analyze_research_topic(self, query: str) -> str:
         """Generate research questions and angles for a topic"""
-        prompt = f"""
-        For the research topic: "{query}"
-        
-        Please provide:
-        1. Key sub-topics to investigate
-        2. Important questions to answer
-        3. Potential sources to explore
-        4. Expected findings or insights
-        
-        Format your response in a structured way.
-        """
+        prompt = (f"Research topic: \"{query}\"\n"
+                  "List, as structured sections: 1. key sub-topics 2. important questions "
+                  "3. sources to explore 4. expected findings.")
 
         try:
-            result = subprocess.run(
-                ['ollama', 'run', self.model, prompt],
-                capture_output=True,
-                text=True,
-                timeout=90
-            )
-
-            if result.returncode == 0:
-                return result.stdout.strip()
-            else:
-                return f"Analysis error: {result.stderr}"
-
+            # The four-part answer needs more room than a summary
+            return self._generate(
+                prompt, {**self.GENERATE_OPTIONS, "num_predict": 512})
+        except ollama.ResponseError as e:
+            return f"Analysis error: {e.error}"
         except Exception as e:
             return f"Research analysis failed: {str(e)}"
 
@@ -130,36 +247,91 @@ class OllamaProcessor:
 class ResearchKnowledgeBase:
     """Vector database for storing and retrieving research data"""
 
-    def __init__(self, persist_directory: str = "./research_db"):
+    def __init__(self, persist_directory: str = "./research_db",
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
         self.client = chromadb.PersistentClient(path=persist_directory)
+        # Full source text lives on disk; Chroma only indexes a short document
+        self.blob_directory = os.path.join(persist_directory, "blobs")
+        # Embeddings are computed here in batches, not by Chroma per document
         self.collection = self.client.get_or_create_collection(
             name="research_data",
-            metadata={"description": "Stored research articles and findings"}
+            metadata={"description": "Stored research articles and findings"},
+            embedding_function=None
         )
-
-    def store_research(self, documents: List[str], metadatas: List[Dict], ids: List[str]):
-        """Store research documents in the knowledge base"""
+        self.embedding_model = embedding_model
+
+    @property
+    def embedder(self) -> OnnxEmbedder:
+        """Lazily load the embedding model on first use"""
+        return _load_embedder(self.embedding_model)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batched forward passes"""
+        return self.embedder.encode(texts, batch_size=32).tolist()
+
+    def _write_blobs(self, full_contents: List[str], metadatas: List[Dict]):
+        """Write full contents to the paths recorded in their metadata"""
+        os.makedirs(self.blob_directory, exist_ok=True)
+        for full_content, metadata in zip(full_contents, metadatas):
+            with open(metadata["full_content_path"], "w", encoding="utf-8") as blob_file:
+                blob_file.write(full_content)
+
+    @staticmethod
+    def _read_blob(metadata: Optional[Dict]) -> Optional[str]:
+        """Load the full content for a stored document, if it has one"""
+        path = (metadata or {}).get("full_content_path")
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as blob_file:
+            return blob_file.read()
+
+    def store_research(self, documents: List[str], metadatas: List[Dict], ids: List[str],
+                       full_contents: Optional[List[str]] = None):
+        """Store research documents in the knowledge base.
+
+        When full_contents is given, each one is written to the blob
+        directory and referenced from its document's metadata.
+        """
         if not documents:
             print("⚠️ No documents to store")
             return
 
+        if full_contents:
+            for metadata, doc_id in zip(metadatas, ids):
+                metadata["full_content_path"] = os.path.join(
+                    self.blob_directory, f"{doc_id}.txt")
+
         try:
             self.collection.add(
                 documents=documents,
+                embeddings=self._embed(documents),
                 metadatas=metadatas,
                 ids=ids
             )
+            # Written only once the documents referencing them exist
+            if full_contents:
+                self._write_blobs(full_contents, metadatas)
             print(f"💾 Stored {len(documents)} research documents")
         except Exception as e:
             print(f"❌ Error storing research: {e}")
 
-    def search_similar(self, query: str, n_results: int = 5) -> Dict[str, Any]:
-        """Search for similar research content"""
+    def search_similar(self, query: str, n_results: int = 5,
+                       include_full_content: bool = False) -> Dict[str, Any]:
+        """Search for similar research content.
+
+        With include_full_content, the stored full text of each hit is read
+        from disk into "full_contents", shaped like "metadatas".
+        """
         try:
             results = self.collection.query(
-                query_texts=[query],
+                query_embeddings=self._embed([query]),
                 n_results=n_results
             )
+            if include_full_content:
+                results["full_contents"] = [
+                    [self._read_blob(metadata) for metadata in metadata_list]
+                    for metadata_list in results.get("metadatas") or []
+                ]
             return results
         except Exception as e:
             print(f"❌ Search error: {e}")
@@ -168,12 +340,9 @@ class ResearchKnowledgeBase:
     def get_all_documents(self) -> Dict[str, Any]:
         """Retrieve all stored research documents"""
         try:
-            # ChromaDB doesn't have a direct "get all" method, so we use a broad search
-            results = self.collection.query(
-                query_texts=["research"],
-                n_results=1000  # Large number to get all documents
-            )
-            return results
+            # A plain scan: no query embedding or nearest-neighbour search needed
+            return self.collection.get(
+                limit=1000, include=["documents", "metadatas"])
         except Exception as e:
             print(f"❌ Error retrieving documents: {e}")
             return {"documents": [], "metadatas": [], "ids": []}
@@ -208,43 +377,75 @@ class DeepResearchAgent:
         metadatas = []
         ids = []
 
-        for i, item in enumerate(results):
-            content = item.get('content', '')
+        sources = [(i, item) for i, item in enumerate(results)
+                   if item.get('content')]
+        contents = [item['content'] for _, item in sources]
+
+        # The summarizer only reads max_length chars of the overall input,
+        # so copy no more than that
+        overall_max_length = self.ollama_processor.SUMMARY_MAX_LENGTH
+        overall_buffer = io.StringIO()
+        remaining = overall_max_length
+        for content in contents:
+            if overall_buffer.tell():
+                if remaining <= 1:
+                    break
+                overall_buffer.write(' ')
+                remaining -= 1
+            take = content[:remaining]
+            overall_buffer.write(take)
+            remaining -= len(take)
+            if remaining <= 0:
+                break
+
+        # Step 3: Generate AI summaries concurrently. The overall insights
+        # (Step 4) are submitted first so they overlap the per-source work.
+        max_workers = int(os.getenv('OLLAMA_NUM_PARALLEL', '4'))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            print("💡 Generating overall research insights...")
+            overall_future = executor.submit(
+                self.ollama_processor.summarize_content,
+                overall_buffer.getvalue(), overall_max_length)
+            print(f"🤖 Summarizing {len(contents)}/{len(results)} results...")
+            summary_futures = [executor.submit(self.ollama_processor.summarize, content)
+                               for content in contents]
+            overall_insights = overall_future.result()
+
+        timestamp = time.time()
+        for (i, item), summary_future in zip(sources, summary_futures):
+            content = item['content']
+            try:
+                summary = summary_future.result()
+                indexed_text = summary
+            except SummarizationError as e:
+                # Show the failure to the user, but never index it
+                summary = str(e)
+                indexed_text = content[:1024]
             title = item.get('title', f'Result {i+1}')
             source = item.get('source', 'Unknown')
 
-            if content:
-                # Step 3: Generate AI summary
-                print(f"🤖 Summarizing result {i+1}/{len(results)}...")
-                summary = self.ollama_processor.summarize_content(content)
-
-                summaries.append({
-                    "title": title,
-                    "source": source,
-                    "summary": summary,
-                    "original_content": content[:500] + "..." if len(content) > 500 else content
-                })
-
-                # Prepare for knowledge base storage
-                documents.append(content)
-                metadatas.append({
-                    "title": title,
-                    "source": source,
-                    "query": query,
-                    "timestamp": time.time()
-                })
-                ids.append(f"doc_{int(time.time())}_{i}")
+            preview = content[:500]
+            summaries.append({
+                "title": title,
+                "source": source,
+                "summary": summary,
+                "original_content": preview + "..." if len(content) > 500 else content
+            })
+
+            # Index the summary (or a short prefix); full text goes to a blob
+            documents.append(indexed_text)
+            metadatas.append({
+                "title": title,
+                "source": source,
+                "query": query,
+                "timestamp": timestamp
+            })
+            ids.append(f"doc_{uuid.uuid4().hex}")
 
         # Store in knowledge base
         if documents:
-            self.knowledge_base.store_research(documents, metadatas, ids)
-
-        # Step 4: Generate overall research insights
-        print("💡 Generating overall research insights...")
-        all_content = " ".join([item.get('content', '')
-                               for item in results if item.get('content')])
-        overall_insights = self.ollama_processor.summarize_content(
-            all_content[:3000])
+            self.knowledge_base.store_research(
+                documents, metadatas, ids, full_contents=contents)
 
         return {
             "query": query,
@@ -258,6 +459,8 @@ class DeepResearchAgent:
         """Retrieve all previous research from knowledge base"""
         return self.knowledge_base.get_all_documents()
 
-    def search_previous_research(self, query: str) -> Dict[str, Any]:
+    def search_previous_research(self, query: str,
+                                 include_full_content: bool = False) -> Dict[str, Any]:
         """Search through previous research findings"""
-        return self.knowledge_base.search_similar(query)
+        return self.knowledge_base.search_similar(
+            query, include_full_content=include_full_content)